@@ -80,8 +80,23 @@ namespace Azathrix.PackFlow.Editor.Core
             else
             {
                 context.LogError($"========== 管道执行失败于步骤 {result.FailedStep} ==========");
+
+                foreach (var callback in context.FailureCallbacks)
+                {
+                    try
+                    {
+                        callback();
+                    }
+                    catch (Exception e)
+                    {
+                        context.LogError($"失败回调异常: {e.Message}");
+                    }
+                }
             }
 
+            // 多个管道共用同一个上下文，回调不能留给后续管道
+            context.FailureCallbacks.Clear();
+
             return result;
         }
     }
@@ -1,3 +1,4 @@
+using System;
 using System.Collections.Generic;
 using UnityEditor;
 
@@ -38,6 +39,11 @@ namespace Azathrix.PackFlow.Editor.Core
         /// </summary>
         public Dictionary<string, object> Data { get; } = new();
 
+        /// <summary>
+        /// 管道执行失败时的清理回调，只对注册它的管道有效，管道执行结束后清空
+        /// </summary>
+        public List<Action> FailureCallbacks { get; } = new();
+
         /// <summary>
         /// 构建日志
         /// </summary>
@@ -1,3 +1,4 @@
+using System;
 using System.Collections.Generic;
 using System.Diagnostics;
 using System.IO;
@@ -45,20 +46,49 @@ namespace Azathrix.PackFlow.Editor.Steps
                 return true;
             }
 
+            // 本管线的监听上传进程已在构建前启动，这里只通知构建完成；用过即清除，避免后续管线误用
+            var doneFileKey = WatchUploadStep.GetDoneFileKey(_pipeline);
+            var doneFile = context.GetData<string>(doneFileKey);
+            if (!string.IsNullOrEmpty(doneFile))
+            {
+                context.Data.Remove(doneFileKey);
+                File.WriteAllText(doneFile, DateTime.Now.ToString("O"));
+                context.Log("构建完成，已通知监听上传进程发布");
+                return true;
+            }
+
             if (IsUploading)
             {
                 context.LogError("上传正在进行中...");
                 return false;
             }
 
-            var outputDirs = _pipeline.GetUploadDirectories(context);
+            if (!TryPrepareUpload(_pipeline, context, true, out var scriptDir, out var pyArgs, out _))
+                return false;
+
+            StartUploadProcess(context, scriptDir, pyArgs);
+            return true; // 启动成功，异步等待结果
+        }
+
+        /// <summary>
+        /// 根据管线上传配置构建 upload.py 参数
+        /// </summary>
+        /// <param name="requireExisting">是否只上传已存在的包目录（监听模式在构建前启动，目录可能尚未创建）</param>
+        internal static bool TryPrepareUpload(IBuildPipeline pipeline, PackFlowBuildContext context, bool requireExisting,
+            out string scriptDir, out string pyArgs, out string platformDir)
+        {
+            scriptDir = null;
+            pyArgs = null;
+            platformDir = null;
+
+            var outputDirs = pipeline.GetUploadDirectories(context);
             if (outputDirs == null || outputDirs.Count == 0)
             {
                 context.LogError("找不到构建输出目录");
                 return false;
             }
 
-            var config = _pipeline.GetUploadConfig();
+            var config = pipeline.GetUploadConfig();
             if (config == null)
             {
                 context.LogError("上传配置为空");
@@ -78,7 +108,7 @@ namespace Azathrix.PackFlow.Editor.Steps
             var packageNames = new List<string>();
             foreach (var dir in outputDirs)
             {
-                if (Directory.Exists(dir))
+                if (!requireExisting || Directory.Exists(dir))
                     packageNames.Add(Path.GetFileName(dir));
             }
 
@@ -90,7 +120,7 @@ namespace Azathrix.PackFlow.Editor.Steps
 
             // 获取 bundle 根目录（从第一个目录推断）
             var firstDir = outputDirs[0];
-            var platformDir = Path.GetDirectoryName(firstDir);
+            platformDir = Path.GetDirectoryName(firstDir);
             var bundleRoot = Path.GetDirectoryName(platformDir);
             var platform = Path.GetFileName(platformDir);
 
@@ -104,12 +134,12 @@ namespace Azathrix.PackFlow.Editor.Steps
             context.Log($"版本: {version}");
 
             // 构建 Python 参数
-            var scriptDir = Path.GetDirectoryName(uploaderPath);
-            var pyArgs = $"{string.Join(" ", packageNames)} " +
-                         $"--api-type {apiType} " +
-                         $"--upload-endpoint \"{config.endpoint}\" " +
-                         $"--bundle-root \"{bundleRoot}\" " +
-                         $"--platform \"{platform}\"";
+            scriptDir = Path.GetDirectoryName(uploaderPath);
+            pyArgs = $"{string.Join(" ", packageNames)} " +
+                     $"--api-type {apiType} " +
+                     $"--upload-endpoint \"{config.endpoint}\" " +
+                     $"--bundle-root \"{bundleRoot}\" " +
+                     $"--platform \"{platform}\"";
 
             if (config.apiType != UploadApiType.LocalHttp)
             {
@@ -124,6 +154,14 @@ namespace Azathrix.PackFlow.Editor.Steps
             if (!string.IsNullOrEmpty(version))
                 pyArgs += $" --version \"{version}\"";
 
+            return true;
+        }
+
+        /// <summary>
+        /// 在新的 cmd 窗口中启动 upload.py 并监控退出
+        /// </summary>
+        internal static void StartUploadProcess(PackFlowBuildContext context, string scriptDir, string pyArgs)
+        {
             // cmd 命令 - /C 表示执行完后关闭窗口
             var cmdArgs = $"/C python upload.py {pyArgs}";
 
@@ -144,8 +182,6 @@ namespace Azathrix.PackFlow.Editor.Steps
 
             // 注册 update 回调来监控进程
             EditorApplication.update += CheckUploadProcess;
-
-            return true; // 启动成功，异步等待结果
         }
 
         private static void CheckUploadProcess()
@@ -170,7 +206,7 @@ namespace Azathrix.PackFlow.Editor.Steps
             }
         }
 
-        private string GetUploaderPath()
+        private static string GetUploaderPath()
         {
             var packageInfo = UnityEditor.PackageManager.PackageInfo.FindForAssembly(typeof(UploadStep).Assembly);
             if (packageInfo != null)
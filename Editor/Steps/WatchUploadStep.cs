@@ -0,0 +1,91 @@
+using System;
+using System.Globalization;
+using System.IO;
+using System.Linq;
+using Azathrix.PackFlow.Editor.Attributes;
+using Azathrix.PackFlow.Editor.Core;
+using Azathrix.PackFlow.Editor.Interfaces;
+
+namespace Azathrix.PackFlow.Editor.Steps
+{
+    /// <summary>
+    /// 监听上传步骤：构建前启动 upload.py --watch，边构建边上传，
+    /// 构建完成后由 UploadStep 写入完成标记，构建失败时写入失败标记。
+    /// 名称不含"上传"，"仅上传"不会执行此步骤，由 UploadStep 直接上传
+    /// </summary>
+    [PipelineStep] // 适用于所有Pipeline
+    public class WatchUploadStep : IBuildStep
+    {
+        private const string DoneFileKey = "PackFlow.WatchDoneFile";
+
+        private const string DoneMarker = ".build_done";
+        private const string AbortMarker = ".build_abort";
+
+        private readonly IBuildPipeline _pipeline;
+        private bool _enabled;
+
+        public string Name => "监听构建输出";
+        public int Order => -100;
+        public bool Enabled { get => _enabled; set => _enabled = value; }
+        public bool HasConfigGUI => false;
+
+        public WatchUploadStep(IBuildPipeline pipeline)
+        {
+            _pipeline = pipeline;
+        }
+
+        public void DrawConfigGUI()
+        {
+        }
+
+        /// <summary>
+        /// 上下文中保存该管线构建完成标记路径的键，多个管线共用同一个上下文
+        /// </summary>
+        public static string GetDoneFileKey(IBuildPipeline pipeline)
+        {
+            return $"{DoneFileKey}.{pipeline.Name}";
+        }
+
+        public bool Execute(PackFlowBuildContext context)
+        {
+            if (!context.DoUpload)
+            {
+                context.Log("跳过监听上传");
+                return true;
+            }
+
+            // 没有上传步骤写入完成标记时，监听进程只能等到超时
+            if (!_pipeline.Steps.Any(s => s is UploadStep && s.Enabled))
+            {
+                context.Log("未启用上传步骤，跳过监听上传");
+                return true;
+            }
+
+            if (UploadStep.IsUploading)
+            {
+                context.LogError("上传正在进行中...");
+                return false;
+            }
+
+            if (!UploadStep.TryPrepareUpload(_pipeline, context, false, out var scriptDir, out var pyArgs, out var platformDir))
+                return false;
+
+            var doneFile = Path.Combine(platformDir, DoneMarker);
+            var abortFile = Path.Combine(platformDir, AbortMarker);
+            Directory.CreateDirectory(platformDir);
+            if (File.Exists(doneFile))
+                File.Delete(doneFile);
+            if (File.Exists(abortFile))
+                File.Delete(abortFile);
+
+            // 只跟随此刻之后新建的版本目录
+            var since = (DateTimeOffset.UtcNow.ToUnixTimeMilliseconds() / 1000.0).ToString("F3", CultureInfo.InvariantCulture);
+            pyArgs += $" --watch --done-file \"{doneFile}\" --since {since}";
+
+            UploadStep.StartUploadProcess(context, scriptDir, pyArgs);
+            context.SetData(GetDoneFileKey(_pipeline), doneFile);
+            context.FailureCallbacks.Add(() => File.WriteAllText(abortFile, DateTime.Now.ToString("O")));
+            return true;
+        }
+    }
+}
@@ -0,0 +1,10 @@
+import hashlib
+
+
+def calc_md5(file_path: str) -> str:
+    """计算文件 MD5"""
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            md5.update(chunk)
+    return md5.hexdigest()
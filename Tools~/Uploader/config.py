@@ -6,3 +6,17 @@ BUNDLE_ROOT = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "..", "GameShell",
 # 默认配置
 PLATFORM = "Android"
 MAX_VERSION_COUNT = 5
+MAX_VERSION_BYTES = 0  # 保留版本目录的磁盘预算(字节)，0 为不限制
+MAX_VERSION_AGE_DAYS = 0  # 保留版本的最大天数，0 为不限制
+DEDUPE_VERSIONS = False  # 保留版本间相同文件使用硬链接（最新目录除外），被链接的文件原地改写会影响所有副本
+VERIFY_SAMPLE_RATE = 0.0  # 上传校验时抽样下载回读的比例，0 为只做 HEAD 校验
+VERIFY_WORKERS = 16  # 上传校验的并发请求数
+BUILD_DONE_MARKER = ".build_done"  # 监听模式下构建完成标记文件名
+BUILD_ABORT_MARKER = ".build_abort"  # 监听模式下构建失败标记文件名，与完成标记位于同一目录
+WATCH_TIMEOUT_SECONDS = 3 * 3600  # 监听模式等待构建完成的超时(秒)，0 为不限制
+WATCH_SETTLE_SECONDS = 2.0  # 监听模式下文件多久无变化视为写入完成(秒)
+WATCH_POLL_INTERVAL = 0.5  # 监听模式轮询间隔(秒)
+WATCH_WORKERS = 8  # 监听模式并发上传数
+FANOUT_WORKERS = 8  # 多目标上传时同时处理的文件数
+FANOUT_MAX_BUFFER = 64 * 1024 * 1024  # 多目标上传时读入内存分发的最大文件大小(字节)，更大的文件由各目标分别读取
+FANOUT_BUFFER_BUDGET = 256 * 1024 * 1024  # 多目标上传时所有包共用的内存缓冲上限(字节)，超出时由各目标分别读取
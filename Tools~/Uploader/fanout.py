@@ -0,0 +1,153 @@
+"""
+多目标上传
+支持内存上传的目标共用一次磁盘读取逐个文件上传，
+不支持的目标（如每次上传都要启动进程的 aws cli）同时用各自的 upload_files 批量上传
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from uploaders import BaseUploader
+
+
+class BufferBudget:
+    """所有包、所有线程共享的内存缓冲预算，预算不足时不缓冲，由各目标分别读取文件"""
+
+    def __init__(self, limit: int, max_file: int):
+        self.limit = limit
+        self.max_file = min(max_file, limit)
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, size: int) -> bool:
+        if size > self.max_file:
+            return False
+        with self._lock:
+            if self._used + size > self.limit:
+                return False
+            self._used += size
+            return True
+
+    def release(self, size: int):
+        with self._lock:
+            self._used -= size
+
+
+def upload_to_targets(local_path: str, remote_path: str, md5: str, uploaders: dict,
+                      executor: ThreadPoolExecutor, budget: BufferBudget) -> dict:
+    """
+    上传单个文件到多个目标
+
+    只有一个目标、或目标不支持内存上传时直接 upload_file（保留后端的 Content-MD5 校验）；
+    否则在预算允许时读入内存一次，分发给所有支持内存上传的目标
+
+    Args:
+        uploaders: {目标名: BaseUploader}
+        executor: 执行各目标上传的线程池
+        budget: 共享的内存缓冲预算
+
+    Returns:
+        {目标名: 是否成功}
+    """
+    streaming = [name for name, uploader in uploaders.items() if uploader.streams_data]
+    size = 0
+    data = None
+    if len(streaming) > 1:
+        try:
+            size = os.path.getsize(local_path)
+            if budget.try_acquire(size):
+                try:
+                    with open(local_path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    budget.release(size)
+                    raise
+        except OSError as e:
+            print(f"读取失败 {local_path}: {e}")
+            return {name: False for name in uploaders}
+
+    def target_task(name: str, uploader: BaseUploader):
+        try:
+            if data is None or name not in streaming:
+                return uploader.upload_file(local_path, remote_path, md5)
+            return uploader.upload_data(data, remote_path, md5)
+        except Exception as e:
+            print(f"上传失败 {remote_path}: {e}")
+            return False
+
+    try:
+        if len(uploaders) == 1:
+            name, uploader = next(iter(uploaders.items()))
+            return {name: target_task(name, uploader)}
+        futures = {name: executor.submit(target_task, name, uploader) for name, uploader in uploaders.items()}
+        return {name: future.result() for name, future in futures.items()}
+    finally:
+        if data is not None:
+            budget.release(size)
+
+
+def upload_fanout(local_dir: str, remote_prefix: str, plans: dict, checksums: dict,
+                  workers: int, budget: BufferBudget) -> dict:
+    """
+    按各目标的差异列表上传文件
+
+    streams_data 为 False 的目标整个列表交给一次 upload_files，与其余目标的逐文件上传并行进行
+
+    Args:
+        plans: {目标名: (BaseUploader, [需要上传的相对路径], delete_all)}，
+            delete_all 为 True 时先清理该目标的远程目录（与 upload_files 一致）
+        checksums: {相对路径: MD5}
+        workers: 同时处理的文件数
+
+    Returns:
+        {目标名: [上传失败的相对路径]}
+    """
+    batch_plans = {name: plan for name, plan in plans.items() if plan[1] and not plan[0].streams_data}
+    needs = {}
+    for name, (uploader, files, delete_all) in plans.items():
+        if name in batch_plans:
+            continue
+        if delete_all:
+            uploader.clear_remote_dir(remote_prefix)
+        for rel_path in files:
+            needs.setdefault(rel_path, []).append(name)
+
+    failed = {name: [] for name in plans}
+    if not needs and not batch_plans:
+        return failed
+
+    print(f"多目标上传: {len(needs)} 个文件逐个上传, {len(batch_plans)} 个目标批量上传")
+
+    def batch_task(name):
+        uploader, files, delete_all = batch_plans[name]
+        try:
+            ok = uploader.upload_files(local_dir, remote_prefix, files, delete_all, checksums=checksums)
+        except Exception as e:
+            print(f"[{name}] 上传失败: {e}")
+            ok = False
+        return name, [] if ok else list(files)
+
+    with ThreadPoolExecutor(max_workers=max(len(batch_plans), 1)) as batch_pool, \
+            ThreadPoolExecutor(max_workers=workers * len(plans)) as target_pool, \
+            ThreadPoolExecutor(max_workers=workers) as file_pool:
+        batch_futures = [batch_pool.submit(batch_task, name) for name in batch_plans]
+
+        def file_task(rel_path):
+            local_path = os.path.join(local_dir, rel_path)
+            remote_path = f"{remote_prefix}/{rel_path}".replace("\\", "/")
+            uploaders = {name: plans[name][0] for name in needs[rel_path]}
+            return rel_path, upload_to_targets(local_path, remote_path, checksums.get(rel_path),
+                                               uploaders, target_pool, budget)
+
+        for rel_path, results in file_pool.map(file_task, sorted(needs)):
+            for name, ok in results.items():
+                if not ok:
+                    failed[name].append(rel_path)
+
+        for future in batch_futures:
+            name, failed_files = future.result()
+            failed[name] = failed_files
+
+    for name, (_, files, _) in plans.items():
+        print(f"[{name}] 上传完成: {len(files) - len(failed[name])}/{len(files)}")
+    return failed
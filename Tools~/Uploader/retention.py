@@ -0,0 +1,298 @@
+"""
+本地版本目录保留策略
+按数量、磁盘预算、天数筛选要保留的 YYYY-MM-DD-N 目录，
+可选对保留目录间内容相同的文件做硬链接去重，去重和删除都在后台线程中进行
+"""
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import date, datetime
+
+from checksum import calc_md5
+
+TRASH_PREFIX = ".trash-"
+HASH_CACHE_FILE = ".md5cache.json"
+
+_VERSION_DIR_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})-(\d+)$")
+_pending = []
+_pending_lock = threading.Lock()
+
+
+def _dir_date(dir_name: str):
+    """从目录名解析日期，解析失败返回 None"""
+    match = _VERSION_DIR_PATTERN.match(dir_name)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _load_hash_cache(package_dir: str) -> dict:
+    """读取去重用的 MD5 缓存 {"目录名/相对路径": [size, mtime_ns, md5]}"""
+    try:
+        with open(os.path.join(package_dir, HASH_CACHE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hash_cache(package_dir: str, cache: dict):
+    cache_file = os.path.join(package_dir, HASH_CACHE_FILE)
+    temp_file = cache_file + ".tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        print(f"写入 MD5 缓存失败: {e}")
+
+
+def _load_manifest(version_dir: str):
+    """读取 version.json 中的文件 MD5 表和 version.json 的 mtime_ns，不存在或损坏返回 ({}, 0)"""
+    version_file = os.path.join(version_dir, "version.json")
+    try:
+        mtime_ns = os.stat(version_file).st_mtime_ns
+        with open(version_file, "r", encoding="utf-8") as f:
+            return json.load(f).get("files", {}), mtime_ns
+    except (OSError, ValueError):
+        return {}, 0
+
+
+def _hash_files(package_dir: str, dir_name: str, cache: dict, new_cache: dict) -> dict:
+    """
+    计算目录内各文件的 MD5，返回 {相对路径: (md5, size, mtime_ns)}
+
+    size/mtime 与缓存一致时直接使用缓存；version.json 只对在它之后未被修改过的文件可信；
+    其余文件现场计算
+    """
+    version_dir = os.path.join(package_dir, dir_name)
+    manifest, manifest_mtime = _load_manifest(version_dir)
+    result = {}
+    for root, _, filenames in os.walk(version_dir):
+        for filename in filenames:
+            if filename == "version.json":
+                continue
+            file_path = os.path.join(root, filename)
+            rel_path = os.path.relpath(file_path, version_dir).replace("\\", "/")
+            key = f"{dir_name}/{rel_path}"
+            try:
+                st = os.stat(file_path)
+                cached = cache.get(key)
+                if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                    md5 = cached[2]
+                elif rel_path in manifest and st.st_mtime_ns <= manifest_mtime:
+                    md5 = manifest[rel_path]
+                else:
+                    md5 = calc_md5(file_path)
+            except OSError:
+                continue
+            new_cache[key] = [st.st_size, st.st_mtime_ns, md5]
+            result[rel_path] = (md5, st.st_size, st.st_mtime_ns)
+    return result
+
+
+def _same_stat(path: str, size: int, mtime_ns: int) -> bool:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_size == size and st.st_mtime_ns == mtime_ns
+
+
+def _scan_inodes(version_dir: str) -> dict:
+    """统计目录内文件的 {(st_dev, st_ino): size}，硬链接只计一次"""
+    inodes = {}
+    for root, _, filenames in os.walk(version_dir):
+        for filename in filenames:
+            try:
+                st = os.stat(os.path.join(root, filename))
+            except OSError:
+                continue
+            inodes[(st.st_dev, st.st_ino)] = st.st_size
+    return inodes
+
+
+def _total_bytes(usage: dict, dir_names: list) -> int:
+    """计算多个目录合计占用的磁盘字节数（跨目录共享的硬链接只计一次）"""
+    merged = {}
+    for name in dir_names:
+        merged.update(usage[name])
+    return sum(merged.values())
+
+
+def dedupe_files(package_dir: str, dir_names: list) -> int:
+    """
+    将目录间 MD5 相同的文件替换为硬链接
+
+    硬链接的文件被原地改写时所有目录中的副本都会改变，调用方不应传入仍可能被写入的目录（最新版本目录）。
+    MD5 按 size/mtime 缓存在包目录的 .md5cache.json 中，链接前再次确认两个文件的 size/mtime 未变化。
+    以较新的目录中的文件为基准，旧目录中的相同文件改为指向它。
+
+    Returns:
+        节省的字节数
+    """
+    cache = _load_hash_cache(package_dir)
+    new_cache = {}
+    canonical = {}
+    saved = 0
+    try:
+        for dir_name in reversed(dir_names):
+            version_dir = os.path.join(package_dir, dir_name)
+            for rel_path, (md5, size, mtime_ns) in _hash_files(package_dir, dir_name, cache, new_cache).items():
+                file_path = os.path.join(version_dir, rel_path)
+                key = (md5, size)
+                source = canonical.get(key)
+                if source is None:
+                    canonical[key] = (file_path, mtime_ns)
+                    continue
+                source_path, source_mtime = source
+                if not _same_stat(source_path, size, source_mtime) or not _same_stat(file_path, size, mtime_ns):
+                    # 计算 MD5 之后文件被改写，跳过
+                    continue
+                if os.path.samefile(source_path, file_path):
+                    continue
+                nlink = os.stat(file_path).st_nlink
+                temp_path = file_path + ".lnk"
+                try:
+                    os.link(source_path, temp_path)
+                    os.replace(temp_path, file_path)
+                except OSError as e:
+                    # 跨分区或文件系统不支持硬链接时放弃去重
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
+                    print(f"硬链接失败 {rel_path}: {e}")
+                    return saved
+                new_cache[f"{dir_name}/{rel_path}"] = [size, source_mtime, md5]
+                if nlink == 1:
+                    saved += size
+    finally:
+        _save_hash_cache(package_dir, new_cache)
+    return saved
+
+
+def select_versions(package_dir: str, dir_names: list, max_count: int, max_bytes: int = 0,
+                    max_age_days: int = 0, today: date = None) -> list:
+    """
+    计算需要删除的版本目录，dir_names 需按从旧到新排序，最新目录始终保留
+
+    Args:
+        max_count: 最多保留的目录数，<= 0 不限制
+        max_bytes: 保留目录合计占用上限（字节），<= 0 不限制
+        max_age_days: 目录名日期距今超过该天数则删除，<= 0 不限制
+
+    Returns:
+        需要删除的目录名列表（从旧到新）
+    """
+    if not dir_names:
+        return []
+
+    today = today or date.today()
+    keep = list(dir_names)
+    newest = keep.pop()
+
+    if max_count > 0:
+        keep = keep[-(max_count - 1):] if max_count > 1 else []
+
+    if max_age_days > 0:
+        keep = [name for name in keep
+                if _dir_date(name) is None or (today - _dir_date(name)).days <= max_age_days]
+
+    keep.append(newest)
+
+    if max_bytes > 0:
+        usage = {name: _scan_inodes(os.path.join(package_dir, name)) for name in keep}
+        while len(keep) > 1 and _total_bytes(usage, keep) > max_bytes:
+            keep.pop(0)
+
+    return [name for name in dir_names if name not in keep]
+
+
+def _remove_dir(path: str):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _start_background(target, args: tuple, name: str):
+    """启动后台线程，调用 wait_pending() 等待完成"""
+    thread = threading.Thread(target=target, args=args, name=name)
+    thread.start()
+    with _pending_lock:
+        _pending.append(thread)
+
+
+def remove_versions(package_dir: str, dir_names: list, background: bool = True):
+    """
+    删除版本目录：先重命名为 .trash- 前缀（立即从版本列表中消失），再删除
+    background 为 True 时删除在后台线程进行，调用 wait_pending() 等待完成
+    """
+    for dir_name in dir_names:
+        dir_path = os.path.join(package_dir, dir_name)
+        trash_path = os.path.join(package_dir, f"{TRASH_PREFIX}{dir_name}")
+        print(f"删除旧版本: {dir_name}")
+        try:
+            os.replace(dir_path, trash_path)
+        except OSError:
+            trash_path = dir_path
+        if not background:
+            _remove_dir(trash_path)
+            continue
+        _start_background(_remove_dir, (trash_path,), f"rm-{dir_name}")
+
+
+def purge_trash(package_dir: str):
+    """清理上次未删除完成的 .trash- 目录"""
+    if not os.path.isdir(package_dir):
+        return
+    stale = [name for name in os.listdir(package_dir) if name.startswith(TRASH_PREFIX)]
+    for name in stale:
+        _start_background(_remove_dir, (os.path.join(package_dir, name),), f"rm-{name}")
+
+
+def _compact(package_dir: str, keep: list, max_bytes: int, dedupe: bool):
+    """硬链接去重后按磁盘预算删除，最新目录不参与去重"""
+    if dedupe and len(keep) > 2:
+        saved = dedupe_files(package_dir, keep[:-1])
+        if saved:
+            print(f"硬链接去重节省: {saved / 1024 / 1024:.1f} MB")
+
+    if max_bytes > 0:
+        remove_versions(package_dir, select_versions(package_dir, keep, 0, max_bytes), background=False)
+
+
+def apply_retention(package_dir: str, dir_names: list, max_count: int, max_bytes: int = 0,
+                    max_age_days: int = 0, dedupe: bool = False, background: bool = True):
+    """
+    执行保留策略：按数量/天数筛选并删除 -> 硬链接去重 -> 按磁盘预算筛选并删除
+
+    background 为 True 时去重和磁盘预算统计（需要遍历、计算 MD5）也在后台线程进行，不阻塞后续上传
+
+    Args:
+        dir_names: 版本目录名列表，从旧到新排序
+    """
+    purge_trash(package_dir)
+
+    # 先删除按数量/天数必删的目录，避免对它们做无用的去重
+    to_delete = select_versions(package_dir, dir_names, max_count, 0, max_age_days)
+    remove_versions(package_dir, to_delete, background)
+    keep = [name for name in dir_names if name not in to_delete]
+
+    if not (dedupe and len(keep) > 2) and max_bytes <= 0:
+        return
+    if background:
+        _start_background(_compact, (package_dir, keep, max_bytes, dedupe), f"compact-{os.path.basename(package_dir)}")
+    else:
+        _compact(package_dir, keep, max_bytes, dedupe)
+
+
+def wait_pending():
+    """等待所有后台去重和删除完成"""
+    with _pending_lock:
+        threads = list(_pending)
+        _pending.clear()
+    if threads:
+        print(f"等待后台清理完成: {len(threads)} 个任务")
+    for thread in threads:
+        thread.join()
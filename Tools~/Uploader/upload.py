@@ -4,15 +4,20 @@
 用法: python upload.py <packages...> [options]
 """
 import argparse
-import hashlib
 import json
 import os
 import re
-import shutil
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import config
+from checksum import calc_md5
+import fanout
+import retention
+import verify
+import watch
 from uploaders import get_uploader
 
 _config = {
@@ -26,17 +31,23 @@ _config = {
     "secret_key": "",
     "platform": config.PLATFORM,
     "max_versions": config.MAX_VERSION_COUNT,
+    "max_version_bytes": config.MAX_VERSION_BYTES,
+    "max_version_age": config.MAX_VERSION_AGE_DAYS,
+    "dedupe_versions": config.DEDUPE_VERSIONS,
     "bundle_root": config.BUNDLE_ROOT,
+    "verify": True,
+    "verify_sample": config.VERIFY_SAMPLE_RATE,
+    "verify_workers": config.VERIFY_WORKERS,
+    "done_file": "",
+    "settle_seconds": config.WATCH_SETTLE_SECONDS,
+    "watch_interval": config.WATCH_POLL_INTERVAL,
+    "watch_timeout": config.WATCH_TIMEOUT_SECONDS,
+    "watch_since": 0.0,
+    "targets": [],
 }
 
-
-def calc_md5(file_path: str) -> str:
-    """计算文件 MD5"""
-    md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        while chunk := f.read(8192):
-            md5.update(chunk)
-    return md5.hexdigest()
+# 多目标上传的内存缓冲预算，所有包（包括监听模式下并行的包）共用
+_buffer_budget = fanout.BufferBudget(config.FANOUT_BUFFER_BUDGET, config.FANOUT_MAX_BUFFER)
 
 
 def find_all_version_dirs(package_dir: str) -> list:
@@ -79,6 +90,12 @@ def generate_version_file(version_dir: str) -> dict:
             rel_path = os.path.relpath(file_path, version_dir).replace("\\", "/")
             files[rel_path] = calc_md5(file_path)
 
+    return write_version_file(version_dir, files)
+
+
+def write_version_file(version_dir: str, files: dict) -> dict:
+    """写入 version.json"""
+    version_file = os.path.join(version_dir, "version.json")
     version_data = {"files": files, "timestamp": datetime.now().isoformat()}
 
     with open(version_file, "w", encoding="utf-8") as f:
@@ -101,17 +118,156 @@ def get_remote_prefix(package_name: str) -> str:
 
 
 def clean_old_versions(package_dir: str):
-    """清理旧版本目录"""
+    """清理旧版本目录（数量/磁盘预算/天数），去重和删除在后台进行"""
     dirs = find_all_version_dirs(package_dir)
-    max_count = _config["max_versions"]
-    if len(dirs) <= max_count:
+    retention.apply_retention(
+        package_dir,
+        dirs,
+        max_count=_config["max_versions"],
+        max_bytes=_config["max_version_bytes"],
+        max_age_days=_config["max_version_age"],
+        dedupe=_config["dedupe_versions"]
+    )
+
+
+def clean_package(package_name: str):
+    """清理包的旧版本目录，无论上传是否成功都会执行，避免失败的构建堆满磁盘"""
+    package_dir = os.path.join(_config["bundle_root"], _config["platform"], package_name)
+    if os.path.isdir(package_dir):
+        clean_old_versions(package_dir)
+
+
+def verify_remote(uploader, version_dir: str, remote_prefix: str, files: dict) -> bool:
+    """校验远程文件，失败的文件重传一次后再次校验"""
+    failed = verify.verify_upload(uploader, version_dir, remote_prefix, files,
+                                  _config["verify_sample"], _config["verify_workers"])
+    if not failed:
+        return True
+
+    # 逐个 upload_file 重传：批量上传（如 aws s3 sync）按大小/时间跳过文件，修复不了大小相同的 MD5 不一致
+    print(f"重传校验失败的文件: {len(failed)} 个")
+    for rel_path in failed:
+        local_path = os.path.join(version_dir, rel_path)
+        if not uploader.upload_file(local_path, f"{remote_prefix}/{rel_path}", files[rel_path]):
+            print(f"文件重传失败: {rel_path}")
+            return False
+    retry_files = {rel_path: files[rel_path] for rel_path in failed}
+    if verify.verify_upload(uploader, version_dir, remote_prefix, retry_files,
+                            _config["verify_sample"], _config["verify_workers"]):
+        print("校验失败，不上传 version.json")
+        return False
+    return True
+
+
+def is_local_api(api_type: str) -> bool:
+    return api_type.lower() in ("local", "localhttp", "http")
+
+
+def make_target(api_type: str, upload_endpoint: str, bucket: str = "", access_key: str = "",
+                secret_key: str = "", name: str = "") -> dict:
+    """构建上传目标配置"""
+    return {
+        "name": name or f"{api_type}:{upload_endpoint}/{bucket}".rstrip("/"),
+        "api_type": api_type,
+        "upload_endpoint": upload_endpoint,
+        "bucket": bucket,
+        "access_key": access_key,
+        "secret_key": secret_key,
+    }
+
+
+def load_targets(path: str) -> list:
+    """
+    从 JSON 文件读取多个上传目标，格式:
+    [{"name": "cos", "api_type": "cos", "upload_endpoint": "ap-guangzhou", "bucket": "...",
+      "access_key": "...", "secret_key": "..."}, ...]
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    targets = [make_target(**item) for item in items]
+    # 各目标的上传计划和结果按名称区分，重名会互相覆盖
+    names = [target["name"] for target in targets]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"目标名称重复: {', '.join(duplicates)}")
+    return targets
+
+
+def create_uploader(target: dict):
+    """根据目标配置创建上传器"""
+    return get_uploader(
+        target["api_type"],
+        endpoint=target["upload_endpoint"],
+        bucket=target["bucket"],
+        access_key=target["access_key"],
+        secret_key=target["secret_key"]
+    )
+
+
+def fetch_remote_version(uploader, remote_version_path: str) -> dict:
+    """下载远程 version.json，不存在或解析失败返回 None"""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
+    temp_file.close()
+
+    remote_version = None
+    if uploader.download_file(remote_version_path, temp_file.name):
+        try:
+            with open(temp_file.name, "r", encoding="utf-8") as f:
+                remote_version = json.load(f)
+        except:
+            pass
+    os.unlink(temp_file.name)
+    return remote_version
+
+
+def connect_targets(remote_prefix: str) -> list:
+    """
+    并发初始化所有目标并获取各自的远程 version.json
+
+    Returns:
+        [(目标名, 上传器, 远程版本信息)]，初始化失败的目标上传器为 None
+    """
+    def connect(target):
+        name = target["name"]
+        try:
+            uploader = create_uploader(target)
+            if not uploader.ensure_bucket():
+                return name, None, None
+        except Exception as e:
+            print(f"[{name}] 初始化失败: {e}")
+            return name, None, None
+        remote_version = fetch_remote_version(uploader, f"{remote_prefix}/version.json")
+        if remote_version:
+            print(f"[{name}] 已获取远程版本信息，将进行增量上传")
+        else:
+            print(f"[{name}] 远程无版本信息，将进行全量上传")
+        return name, uploader, remote_version
+
+    targets = _config["targets"]
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        return list(executor.map(connect, targets))
+
+
+def report_targets(package_name: str, results: dict):
+    """打印各目标的上传结果"""
+    if len(results) < 2:
         return
+    print(f"[{package_name}] 各目标结果:")
+    for name, ok in results.items():
+        print(f"  {'✓' if ok else '✗'} {name}")
+
+
+def publish_version_file(uploader, version_dir: str, remote_prefix: str, files: dict) -> bool:
+    """校验远程文件后上传 version.json"""
+    # 校验通过后才上传 version.json，避免客户端拿到不完整的版本
+    if _config["verify"] and not verify_remote(uploader, version_dir, remote_prefix, files):
+        return False
 
-    to_delete = dirs[:-max_count]
-    for dir_name in to_delete:
-        dir_path = os.path.join(package_dir, dir_name)
-        print(f"删除旧版本: {dir_name}")
-        shutil.rmtree(dir_path)
+    version_file_path = os.path.join(version_dir, "version.json")
+    if not uploader.upload_file(version_file_path, f"{remote_prefix}/version.json", calc_md5(version_file_path)):
+        print("version.json 上传失败")
+        return False
+    return True
 
 
 def upload_package(package_name: str) -> bool:
@@ -137,87 +293,328 @@ def upload_package(package_name: str) -> bool:
     # 生成本地 version.json
     local_version = generate_version_file(version_dir)
 
-    # 获取上传器
-    uploader = get_uploader(
-        _config["api_type"],
-        endpoint=_config["upload_endpoint"],
-        bucket=_config["bucket"],
-        access_key=_config["access_key"],
-        secret_key=_config["secret_key"]
-    )
+    # 初始化上传目标并下载各自的远程 version.json
+    remote_prefix = get_remote_prefix(package_name)
+    print(f"远程路径: {remote_prefix}")
+    local_files = local_version.get("files", {})
 
-    # 确保 bucket 存在
-    if not uploader.ensure_bucket():
+    # 对比 MD5，按目标找出需要上传的文件
+    results = {}
+    plans = {}
+    for name, uploader, remote_version in connect_targets(remote_prefix):
+        if uploader is None:
+            results[name] = False
+            continue
+        remote_files = remote_version.get("files", {}) if remote_version else {}
+
+        changed_files = []
+        for rel_path, md5 in local_files.items():
+            if rel_path not in remote_files or remote_files[rel_path] != md5:
+                changed_files.append(rel_path)
+
+        if not changed_files:
+            print(f"[{name}] 没有文件需要上传")
+            results[name] = True
+            continue
+
+        print(f"[{name}] 需要上传 {len(changed_files)} 个文件 (共 {len(local_files)} 个)")
+        # 没有远程 version.json 时删除整个目录
+        plans[name] = (uploader, changed_files, remote_version is None)
+
+    if len(plans) == 1:
+        # 单个目标使用上传器自己的批量上传
+        name, (uploader, changed_files, delete_all) = next(iter(plans.items()))
+        ok = uploader.upload_files(version_dir, remote_prefix, changed_files, delete_all, checksums=local_files)
+        failed = {name: [] if ok else changed_files}
+    else:
+        # 支持内存上传的目标共用一次磁盘读取，其余目标各自批量上传
+        failed = fanout.upload_fanout(
+            version_dir,
+            remote_prefix,
+            plans,
+            local_files,
+            config.FANOUT_WORKERS,
+            _buffer_budget
+        )
+
+    for name, (uploader, _, _) in plans.items():
+        if failed[name]:
+            print(f"[{name}] 文件上传失败: {len(failed[name])} 个")
+            results[name] = False
+            continue
+        results[name] = publish_version_file(uploader, version_dir, remote_prefix, local_files)
+
+    report_targets(package_name, results)
+    if not all(results.values()):
         return False
 
-    # 下载远程 version.json
+    print(f"上传完成: {package_name}")
+    return True
+
+
+def watch_package(package_name: str) -> bool:
+    """
+    监听模式上传单个包：跟随 watch_since 之后新建的最新版本目录，
+    文件写入稳定后立即计算 MD5，远程 version.json 中没有的路径立即上传，
+    会覆盖已发布路径的文件等到构建完成标记出现后再上传，最后生成并上传 version.json
+
+    检测到构建失败标记或超时则放弃发布：远程只多出旧 version.json 未引用的新文件，已发布的文件不会被覆盖
+    （远程没有 version.json 的目标开始时按全量上传清理远程目录，此时没有已发布的版本）
+    """
+    package_dir = os.path.join(_config["bundle_root"], _config["platform"], package_name)
+    done_file = _config["done_file"]
+    abort_file = get_abort_file()
+
     remote_prefix = get_remote_prefix(package_name)
-    remote_version_path = f"{remote_prefix}/version.json"
+    results = {}
+    uploaders = {}
+    remote_files = {}
+    for name, uploader, remote_version in connect_targets(remote_prefix):
+        if uploader is None:
+            results[name] = False
+            continue
+        uploaders[name] = uploader
+        remote_files[name] = remote_version.get("files", {}) if remote_version else {}
+        # 与 upload_files 的 delete_all 一致：远程没有 version.json 时先清理远程目录
+        if remote_version is None:
+            uploader.clear_remote_dir(remote_prefix)
+    if not uploaders:
+        report_targets(package_name, results)
+        return False
 
-    print(f"Bucket: {_config['bucket']}")
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
-    temp_file.close()
+    print(f"[{package_name}] 等待构建输出: {package_dir}")
+    tracker = None
+    version_dir = None
+    pending = {}  # 相对路径 -> (stat, future)
+    files = {}    # 相对路径 -> (stat, md5)
+    failed = {name: set() for name in uploaders}    # 目标名 -> 上传失败的相对路径
+    deferred = {name: set() for name in uploaders}  # 目标名 -> 构建完成后才上传的相对路径（覆盖已发布文件）
+
+    def process_file(directory, rel_path, stat):
+        """
+        计算 MD5 并上传到远程没有该路径的目标
+
+        Returns:
+            (md5, 失败的目标名, 延后上传的目标名)；计算期间文件被修改返回 (None, [], [])
+        """
+        local_path = os.path.join(directory, rel_path)
+        md5 = calc_md5(local_path)
+        if tracker.stat(rel_path) != stat:
+            return None, [], []
+        targets = {}
+        later = []
+        for name, uploader in uploaders.items():
+            remote_md5 = remote_files[name].get(rel_path)
+            if remote_md5 is None:
+                targets[name] = uploader
+            elif remote_md5 != md5:
+                later.append(name)
+        if not targets:
+            return md5, [], later
+        target_results = fanout.upload_to_targets(local_path, f"{remote_prefix}/{rel_path}", md5, targets,
+                                                  target_pool, _buffer_budget)
+        print(f"[{package_name}] 已上传: {rel_path}")
+        return md5, [name for name, ok in target_results.items() if not ok], later
+
+    def collect(wait: bool):
+        for rel_path, (stat, future) in list(pending.items()):
+            if not wait and not future.done():
+                continue
+            del pending[rel_path]
+            try:
+                md5, failed_targets, deferred_targets = future.result()
+            except Exception as e:
+                print(f"[{package_name}] {rel_path}: {e}")
+                md5, failed_targets, deferred_targets = None, list(uploaders), []
+            for name in uploaders:
+                if name in failed_targets:
+                    failed[name].add(rel_path)
+                else:
+                    failed[name].discard(rel_path)
+                if name in deferred_targets:
+                    deferred[name].add(rel_path)
+                else:
+                    deferred[name].discard(rel_path)
+            if md5 is not None:
+                files[rel_path] = (stat, md5)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=config.WATCH_WORKERS) as executor, \
+            ThreadPoolExecutor(max_workers=config.WATCH_WORKERS * len(uploaders)) as target_pool:
+        while True:
+            if os.path.exists(abort_file):
+                print(f"[{package_name}] 构建失败，放弃发布")
+                collect(wait=True)
+                return False
+            build_done = os.path.exists(done_file)
+
+            latest = find_latest_version_dir(package_dir) if os.path.isdir(package_dir) else None
+            # 只跟随监听开始（watch_since）之后新建的版本目录
+            if latest and os.path.join(package_dir, latest) != version_dir \
+                    and is_created_since(os.path.join(package_dir, latest), _config["watch_since"]):
+                # 出现了新的版本目录，之前目录的结果作废
+                collect(wait=True)
+                version_dir = os.path.join(package_dir, latest)
+                tracker = watch.SettleTracker(version_dir, _config["settle_seconds"], ignore={"version.json"})
+                files.clear()
+                for paths in list(failed.values()) + list(deferred.values()):
+                    paths.clear()
+                print(f"[{package_name}] 跟随版本目录: {latest}")
+
+            if tracker:
+                for rel_path, stat in tracker.poll(force=build_done):
+                    # 同一文件的旧任务必须先结束，否则两次上传同一对象可能旧内容后到
+                    previous = pending.pop(rel_path, None)
+                    if previous and not previous[1].cancel():
+                        previous[1].exception()
+                    future = executor.submit(process_file, version_dir, rel_path, stat)
+                    pending[rel_path] = (stat, future)
+            collect(wait=build_done)
+
+            if build_done:
+                if tracker is None:
+                    print(f"[{package_name}] 错误: 构建已结束但未找到新的版本目录")
+                    return False
+                # 计算期间被修改的文件需要再处理一轮
+                if all(rel_path in files and files[rel_path][0] == tracker.stat(rel_path)
+                       or any(rel_path in failed_files for failed_files in failed.values())
+                       for rel_path in tracker.files()):
+                    break
+                continue
 
-    remote_version = None
-    if uploader.download_file(remote_version_path, temp_file.name):
-        try:
-            with open(temp_file.name, "r", encoding="utf-8") as f:
-                remote_version = json.load(f)
-            print("已获取远程版本信息，将进行增量上传")
-        except:
-            pass
-    else:
-        print("远程无版本信息，将进行全量上传")
-    os.unlink(temp_file.name)
+            if _config["watch_timeout"] and time.monotonic() - start > _config["watch_timeout"]:
+                print(f"[{package_name}] 错误: 等待构建完成超时")
+                collect(wait=True)
+                return False
+            time.sleep(_config["watch_interval"])
+
+    # 处理出错的文件没有 MD5，此时所有目标都已记为失败，不生成 version.json
+    local_files = {rel_path: files[rel_path][1] for rel_path in sorted(tracker.files()) if rel_path in files}
+    if len(local_files) == len(tracker.files()):
+        write_version_file(version_dir, local_files)
+
+    # 构建已完成，上传会覆盖已发布文件的部分
+    plans = {name: (uploaders[name], sorted(deferred[name] & local_files.keys()), False)
+             for name in uploaders if deferred[name] and not failed[name]}
+    if plans:
+        print(f"[{package_name}] 上传覆盖已发布路径的文件")
+        for name, failed_files in fanout.upload_fanout(version_dir, remote_prefix, plans, local_files,
+                                                       config.WATCH_WORKERS, _buffer_budget).items():
+            failed[name].update(failed_files)
+
+    for name, uploader in uploaders.items():
+        if failed[name]:
+            print(f"[{name}] 上传失败文件: {sorted(failed[name])}")
+            results[name] = False
+            continue
+        results[name] = publish_version_file(uploader, version_dir, remote_prefix, local_files)
+
+    report_targets(package_name, results)
+    if not all(results.values()):
+        return False
 
-    # 对比 MD5，找出需要上传的文件
-    local_files = local_version.get("files", {})
-    remote_files = remote_version.get("files", {}) if remote_version else {}
+    print(f"[{package_name}] 上传完成")
+    return True
 
-    changed_files = []
-    for rel_path, md5 in local_files.items():
-        if rel_path not in remote_files or remote_files[rel_path] != md5:
-            changed_files.append(rel_path)
 
-    if not changed_files:
-        print("没有文件需要上传")
-        clean_old_versions(package_dir)
-        return True
+def get_done_file() -> str:
+    """构建完成标记路径，默认 <bundle-root>/<platform>/.build_done"""
+    if _config["done_file"]:
+        return _config["done_file"]
+    return os.path.join(_config["bundle_root"], _config["platform"], config.BUILD_DONE_MARKER)
 
-    print(f"需要上传 {len(changed_files)} 个文件 (共 {len(local_files)} 个)")
 
-    print(f"上传服务器: {_config['bucket']}/{remote_prefix}")
-    # 上传文件，没有远程version.json时删除整个目录
-    delete_all = remote_version is None
-    if not uploader.upload_files(version_dir, remote_prefix, changed_files, delete_all):
-        print("文件上传失败")
-        return False
+def get_abort_file() -> str:
+    """构建失败标记路径，与完成标记位于同一目录"""
+    return os.path.join(os.path.dirname(get_done_file()), config.BUILD_ABORT_MARKER)
 
-    # 上传 version.json
-    version_file_path = os.path.join(version_dir, "version.json")
-    if not uploader.upload_file(version_file_path, remote_version_path):
-        print("version.json 上传失败")
+
+def is_created_since(path: str, since: float) -> bool:
+    try:
+        return os.stat(path).st_mtime >= since
+    except OSError:
         return False
 
-    print(f"上传完成: {package_name}")
-    clean_old_versions(package_dir)
-    return True
+
+def signal_build(marker: str):
+    """写入构建完成/失败标记，通知监听进程"""
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(datetime.now().isoformat())
+    print(f"已写入标记: {marker}")
+
+
+def watch_packages(packages: list) -> bool:
+    """
+    监听模式：并行监听所有包，直到构建完成标记出现
+
+    构建开始前启动 `upload.py <packages> --watch`（编辑器中由 WatchUploadStep 启动），
+    构建结束后写入完成标记（UploadStep 或 `upload.py --signal-done`），
+    构建失败则写入失败标记（BuildPipelineRunner 失败回调或 `upload.py --signal-abort`）
+    """
+    _config["done_file"] = get_done_file()
+    done_file = _config["done_file"]
+    abort_file = get_abort_file()
+    if not _config["watch_since"]:
+        _config["watch_since"] = time.time()
+
+    # 清除监听开始前遗留的标记，监听开始后写入的标记保留（构建可能比本进程启动更快结束）
+    for marker in (done_file, abort_file):
+        if os.path.exists(marker) and not is_created_since(marker, _config["watch_since"]):
+            os.unlink(marker)
+    print(f"监听模式，构建完成标记: {done_file}")
+
+    def watch_and_clean(package_name):
+        try:
+            return watch_package(package_name)
+        finally:
+            clean_package(package_name)
+
+    with ThreadPoolExecutor(max_workers=len(packages)) as executor:
+        results = list(executor.map(watch_and_clean, packages))
+
+    for marker in (done_file, abort_file):
+        if os.path.exists(marker):
+            os.unlink(marker)
+    return all(results)
 
 
 def main():
     parser = argparse.ArgumentParser(description="统一上传工具")
-    parser.add_argument("packages", nargs="+", help="要上传的包名")
+    parser.add_argument("packages", nargs="*", help="要上传的包名")
     parser.add_argument("--api-type", default="minio", help="API 类型: minio, s3, cos")
     parser.add_argument("--upload-endpoint", help="上传服务器地址")
     parser.add_argument("--download-endpoint", help="下载服务器地址")
     parser.add_argument("--bucket", help="Bucket 名称")
+    parser.add_argument("--targets", help="多目标配置 JSON 文件，指定后忽略 --api-type/--upload-endpoint/--bucket/--access-key/--secret-key")
     parser.add_argument("--project-id", help="项目ID (8位哈希)")
     parser.add_argument("--version", help="版本号子目录")
     parser.add_argument("--access-key", help="Access Key")
     parser.add_argument("--secret-key", help="Secret Key")
     parser.add_argument("--platform", default=config.PLATFORM, help="平台名称")
     parser.add_argument("--max-versions", type=int, default=config.MAX_VERSION_COUNT, help="保留版本数")
+    parser.add_argument("--max-version-bytes", type=int, default=config.MAX_VERSION_BYTES,
+                        help="保留版本目录的磁盘预算(字节)，0 为不限制")
+    parser.add_argument("--max-version-age", type=int, default=config.MAX_VERSION_AGE_DAYS,
+                        help="保留版本的最大天数，0 为不限制")
+    parser.add_argument("--dedupe", action="store_true", default=config.DEDUPE_VERSIONS,
+                        help="对保留版本（最新目录除外）做硬链接去重")
+    parser.add_argument("--gc-only", action="store_true", help="只清理本地旧版本目录，不上传")
     parser.add_argument("--bundle-root", help="Bundle根目录路径")
+    parser.add_argument("--no-verify", action="store_true", help="跳过上传后的远程校验")
+    parser.add_argument("--verify-sample", type=float, default=config.VERIFY_SAMPLE_RATE,
+                        help="校验时抽样下载回读的比例 (0~1)")
+    parser.add_argument("--verify-workers", type=int, default=config.VERIFY_WORKERS, help="校验并发数")
+    parser.add_argument("--watch", action="store_true", help="监听模式：边构建边上传，检测到完成标记后发布")
+    parser.add_argument("--done-file", help=f"构建完成标记文件，默认 <bundle-root>/<platform>/{config.BUILD_DONE_MARKER}")
+    parser.add_argument("--settle-seconds", type=float, default=config.WATCH_SETTLE_SECONDS,
+                        help="文件多久无变化视为写入完成(秒)")
+    parser.add_argument("--watch-timeout", type=float, default=config.WATCH_TIMEOUT_SECONDS,
+                        help="等待构建完成的超时(秒)，0 为不限制")
+    parser.add_argument("--since", type=float, default=0,
+                        help="监听模式只跟随该时间(Unix 秒)之后新建的版本目录，默认为进程启动时间")
+    parser.add_argument("--signal-done", action="store_true", help="写入构建完成标记，通知监听进程发布后退出")
+    parser.add_argument("--signal-abort", action="store_true", help="写入构建失败标记，通知监听进程放弃发布后退出")
 
     args = parser.parse_args()
 
@@ -225,6 +622,15 @@ def main():
     _config["api_type"] = args.api_type
     _config["platform"] = args.platform
     _config["max_versions"] = args.max_versions
+    _config["max_version_bytes"] = args.max_version_bytes
+    _config["max_version_age"] = args.max_version_age
+    _config["dedupe_versions"] = args.dedupe
+    _config["verify"] = not args.no_verify
+    _config["verify_sample"] = args.verify_sample
+    _config["verify_workers"] = args.verify_workers
+    _config["settle_seconds"] = args.settle_seconds
+    _config["watch_timeout"] = args.watch_timeout
+    _config["watch_since"] = args.since
 
     if args.upload_endpoint:
         _config["upload_endpoint"] = args.upload_endpoint
@@ -242,22 +648,62 @@ def main():
         _config["secret_key"] = args.secret_key
     if args.bundle_root:
         _config["bundle_root"] = args.bundle_root
+    if args.done_file:
+        _config["done_file"] = args.done_file
 
-    # 验证必要参数
-    if not _config["upload_endpoint"]:
-        print("错误: 必须指定 --upload-endpoint")
-        return 1
+    if args.signal_done or args.signal_abort:
+        signal_build(get_done_file() if args.signal_done else get_abort_file())
+        return 0
 
-    # 非 LocalHttp 需要 bucket
-    is_local = _config["api_type"] in ("local", "localhttp", "http")
-    if not is_local and not _config["bucket"]:
-        print("错误: 必须指定 --bucket")
+    if not args.packages:
+        print("错误: 必须指定要上传的包名")
         return 1
 
-    print(f"API 类型: {_config['api_type']}")
-    print(f"上传服务器: {_config['upload_endpoint']}")
-    print(f"下载服务器: {_config['download_endpoint']}")
-    print(f"Bucket: {_config['bucket']}")
+    if args.gc_only:
+        for package in args.packages:
+            print(f"清理包: {package}")
+            clean_package(package)
+        retention.wait_pending()
+        return 0
+
+    if args.targets:
+        try:
+            _config["targets"] = load_targets(args.targets)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"错误: 读取多目标配置失败 {args.targets}: {e}")
+            return 1
+    else:
+        _config["targets"] = [make_target(
+            _config["api_type"],
+            _config["upload_endpoint"],
+            _config["bucket"],
+            _config["access_key"],
+            _config["secret_key"]
+        )]
+
+    # 验证必要参数
+    if not _config["targets"]:
+        print("错误: 上传目标列表为空")
+        return 1
+    for target in _config["targets"]:
+        if not target["upload_endpoint"]:
+            print(f"错误: 必须指定 --upload-endpoint ({target['name']})")
+            return 1
+
+        # 非 LocalHttp 需要 bucket
+        if not is_local_api(target["api_type"]) and not target["bucket"]:
+            print(f"错误: 必须指定 --bucket ({target['name']})")
+            return 1
+
+    if len(_config["targets"]) == 1:
+        print(f"API 类型: {_config['targets'][0]['api_type']}")
+        print(f"上传服务器: {_config['targets'][0]['upload_endpoint']}")
+        print(f"下载服务器: {_config['download_endpoint']}")
+        print(f"Bucket: {_config['targets'][0]['bucket']}")
+    else:
+        print(f"上传目标: {len(_config['targets'])} 个")
+        for target in _config["targets"]:
+            print(f"  {target['name']}: {target['api_type']} {target['upload_endpoint']} {target['bucket']}")
     if _config["project_id"]:
         print(f"项目ID: {_config['project_id']}")
     print(f"平台: {_config['platform']}")
@@ -266,9 +712,17 @@ def main():
 
     # 上传所有包
     success = True
-    for package in args.packages:
-        if not upload_package(package):
-            success = False
+    if args.watch:
+        success = watch_packages(args.packages)
+    else:
+        for package in args.packages:
+            try:
+                if not upload_package(package):
+                    success = False
+            finally:
+                clean_package(package)
+
+    retention.wait_pending()
 
     print()
     if success:
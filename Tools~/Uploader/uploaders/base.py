@@ -1,9 +1,13 @@
+import base64
 from abc import ABC, abstractmethod
 
 
 class BaseUploader(ABC):
     """上传器抽象基类"""
 
+    # 多目标上传时是否逐文件上传（共用一次磁盘读取），为 False 时整个列表交给 upload_files 批量上传
+    streams_data = True
+
     def __init__(self, endpoint: str, bucket: str, access_key: str = None, secret_key: str = None, **kwargs):
         self.endpoint = endpoint
         self.bucket = bucket
@@ -21,11 +25,54 @@ class BaseUploader(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, local_path: str, remote_path: str) -> bool:
-        """上传单个文件"""
+    def upload_file(self, local_path: str, remote_path: str, md5: str = None) -> bool:
+        """上传单个文件，md5 为文件的十六进制 MD5，后端支持 Content-MD5 时由服务端校验"""
+        pass
+
+    @abstractmethod
+    def upload_data(self, data: bytes, remote_path: str, md5: str = None) -> bool:
+        """上传内存中的文件内容，用于多目标上传时只读取一次磁盘"""
         pass
 
     @abstractmethod
-    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False) -> bool:
-        """上传多个文件，files 为相对于 local_dir 的路径列表，delete_all 为 True 时先删除整个远程目录"""
+    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False,
+                     checksums: dict = None) -> bool:
+        """上传多个文件，files 为相对于 local_dir 的路径列表，delete_all 为 True 时先删除整个远程目录，
+        checksums 为 {相对路径: MD5}"""
         pass
+
+    def clear_remote_dir(self, remote_prefix: str):
+        """全量上传前清理远程目录（upload_files 的 delete_all），默认不删除"""
+        pass
+
+    @abstractmethod
+    def head_file(self, remote_path: str) -> dict:
+        """
+        获取远程文件信息，文件不存在或请求失败返回 None
+
+        Returns:
+            {"size": int, "etag": str, "md5": str 或 None}
+            md5 只取服务端计算或校验过的值：单段上传的 ETag，或上传时经 Content-MD5 校验后写入的元数据；
+            都不满足时为 None，表示内容未经服务端确认
+        """
+        pass
+
+    def stat_prefix(self, remote_prefix: str) -> dict:
+        """
+        批量获取前缀下所有文件信息，格式同 head_file，键为远程路径
+        不支持批量列举的后端返回 None，由调用方逐个 head_file
+        """
+        return None
+
+    @staticmethod
+    def content_md5(md5: str) -> str:
+        """十六进制 MD5 转为 Content-MD5 头使用的 base64 格式"""
+        return base64.b64encode(bytes.fromhex(md5)).decode("ascii")
+
+    @staticmethod
+    def etag_md5(etag: str) -> str:
+        """单段上传的 ETag 即内容 MD5，分段上传的 ETag 带 "-N" 后缀，返回 None"""
+        etag = (etag or "").strip('"').lower()
+        if len(etag) == 32 and all(c in "0123456789abcdef" for c in etag):
+            return etag
+        return None
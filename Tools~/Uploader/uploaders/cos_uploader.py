@@ -50,26 +50,40 @@ class CosUploader(BaseUploader):
             print(f"[COS] 下载失败: {e}")
             return False
 
-    def upload_file(self, local_path: str, remote_path: str) -> bool:
+    def upload_file(self, local_path: str, remote_path: str, md5: str = None) -> bool:
         try:
-            self.client.upload_file(Bucket=self.cos_bucket, Key=remote_path, LocalFilePath=local_path)
+            # EnableMD5 让 SDK 发送 Content-MD5，由服务端校验内容
+            kwargs = {"EnableMD5": True, "Metadata": {"x-cos-meta-md5": md5}} if md5 else {}
+            self.client.upload_file(Bucket=self.cos_bucket, Key=remote_path, LocalFilePath=local_path, **kwargs)
             print(f"[COS] 上传成功: {remote_path}")
             return True
         except Exception as e:
             print(f"[COS] 上传失败: {e}")
             return False
 
-    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False) -> bool:
+    def upload_data(self, data: bytes, remote_path: str, md5: str = None) -> bool:
+        try:
+            kwargs = {"Metadata": {"x-cos-meta-md5": md5}} if md5 else {}
+            self.client.put_object(Bucket=self.cos_bucket, Key=remote_path, Body=data, EnableMD5=True, **kwargs)
+            print(f"[COS] 上传成功: {remote_path}")
+            return True
+        except Exception as e:
+            print(f"[COS] 上传失败: {e}")
+            return False
+
+    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False,
+                     checksums: dict = None) -> bool:
         total = len(files)
         print(f"[COS] 开始并行上传: {total} 个文件")
 
         success = 0
         failed = []
+        checksums = checksums or {}
 
         def upload_task(rel_path):
             local_path = os.path.join(local_dir, rel_path)
             remote_path = f"{remote_prefix}/{rel_path}".replace("\\", "/")
-            return rel_path, self.upload_file(local_path, remote_path)
+            return rel_path, self.upload_file(local_path, remote_path, checksums.get(rel_path))
 
         with ThreadPoolExecutor(max_workers=8) as executor:
             futures = {executor.submit(upload_task, f): f for f in files}
@@ -85,6 +99,21 @@ class CosUploader(BaseUploader):
             print(f"[COS] 失败文件: {failed}")
         return success == total
 
+    def head_file(self, remote_path: str) -> dict:
+        try:
+            headers = self.client.head_object(Bucket=self.cos_bucket, Key=remote_path)
+        except Exception as e:
+            if 'NoSuchResource' not in str(e) and 'NoSuchKey' not in str(e) and '404' not in str(e):
+                print(f"[COS] 获取文件信息失败 {remote_path}: {e}")
+            return None
+        etag = headers.get('ETag', '')
+        return {
+            "size": int(headers.get('Content-Length', -1)),
+            "etag": etag,
+            # 分段上传的 ETag 不是 MD5，此时使用 EnableMD5 校验过的元数据
+            "md5": self.etag_md5(etag) or headers.get('x-cos-meta-md5'),
+        }
+
     def _delete_prefix(self, prefix: str):
         """删除指定前缀的所有对象"""
         try:
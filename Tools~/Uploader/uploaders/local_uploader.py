@@ -10,6 +10,8 @@ class LocalUploader(BaseUploader):
         super().__init__(endpoint, bucket, **kwargs)
         # 本地服务器不需要认证
         self.base_url = endpoint.rstrip("/")
+        # 校验阶段会并发发送大量 HEAD 请求，复用连接
+        self._session = requests.Session()
 
     def ensure_bucket(self) -> bool:
         """本地服务器不需要创建 bucket"""
@@ -30,14 +32,15 @@ class LocalUploader(BaseUploader):
             print(f"下载失败: {e}")
             return False
 
-    def upload_file(self, local_path: str, remote_path: str) -> bool:
+    def upload_file(self, local_path: str, remote_path: str, md5: str = None) -> bool:
         """上传单个文件"""
         try:
             url = f"{self.base_url}/{remote_path}"
             file_size = os.path.getsize(local_path)
+            headers = {"Content-MD5": self.content_md5(md5)} if md5 else None
             print(f"  上传: {os.path.basename(local_path)} ({file_size} bytes) -> {url}")
             with open(local_path, "rb") as f:
-                response = requests.put(url, data=f, timeout=30)
+                response = requests.put(url, data=f, headers=headers, timeout=30)
             if response.status_code == 200:
                 print(f"  ✓ {os.path.basename(local_path)} ({file_size} bytes)")
                 return True
@@ -48,24 +51,45 @@ class LocalUploader(BaseUploader):
             print(f"  ✗ {os.path.basename(local_path)} - {e}")
             return False
 
-    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False) -> bool:
+    def upload_data(self, data: bytes, remote_path: str, md5: str = None) -> bool:
+        """上传内存中的文件内容"""
+        try:
+            url = f"{self.base_url}/{remote_path}"
+            headers = {"Content-MD5": self.content_md5(md5)} if md5 else None
+            response = requests.put(url, data=data, headers=headers, timeout=30)
+            if response.status_code == 200:
+                print(f"  ✓ {remote_path} ({len(data)} bytes)")
+                return True
+            else:
+                print(f"  ✗ {remote_path} - HTTP {response.status_code}")
+                return False
+        except Exception as e:
+            print(f"  ✗ {remote_path} - {e}")
+            return False
+
+    def clear_remote_dir(self, remote_prefix: str):
+        """删除远程目录"""
+        try:
+            url = f"{self.base_url}/{remote_prefix}"
+            requests.delete(url, timeout=30)
+            print(f"已清理远程目录: {remote_prefix}")
+        except:
+            pass
+
+    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False,
+                     checksums: dict = None) -> bool:
         """上传多个文件"""
         if delete_all:
-            # 删除远程目录
-            try:
-                url = f"{self.base_url}/{remote_prefix}"
-                requests.delete(url, timeout=30)
-                print(f"已清理远程目录: {remote_prefix}")
-            except:
-                pass
+            self.clear_remote_dir(remote_prefix)
 
         print(f"开始上传 {len(files)} 个文件...")
         success = True
         uploaded = 0
+        checksums = checksums or {}
         for file in files:
             local_path = os.path.join(local_dir, file)
             remote_path = f"{remote_prefix}/{file}".replace("\\", "/")
-            if self.upload_file(local_path, remote_path):
+            if self.upload_file(local_path, remote_path, checksums.get(file)):
                 uploaded += 1
             else:
                 success = False
@@ -73,6 +97,23 @@ class LocalUploader(BaseUploader):
         print(f"上传完成: {uploaded}/{len(files)} 个文件")
         return success
 
+    def head_file(self, remote_path: str) -> dict:
+        """获取文件信息"""
+        try:
+            url = f"{self.base_url}/{remote_path}"
+            response = self._session.head(url, timeout=3)
+            if response.status_code != 200:
+                return None
+            etag = response.headers.get("ETag", "")
+            return {
+                "size": int(response.headers.get("Content-Length", -1)),
+                "etag": etag,
+                "md5": self.etag_md5(etag),
+            }
+        except Exception as e:
+            print(f"获取文件信息失败 {remote_path}: {e}")
+            return None
+
     def delete_file(self, remote_path: str) -> bool:
         """删除文件"""
         try:
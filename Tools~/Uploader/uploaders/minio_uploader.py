@@ -1,3 +1,4 @@
+import io
 import os
 import time
 import tempfile
@@ -61,7 +62,8 @@ class MinioUploader(BaseUploader):
             print(f"下载失败 {remote_path}: {e}")
             return False
 
-    def upload_file(self, local_path: str, remote_path: str) -> bool:
+    def upload_file(self, local_path: str, remote_path: str, md5: str = None) -> bool:
+        # MinIO SDK 不支持自定义 Content-MD5，内容由校验阶段按 ETag 或回读确认
         retry_count = 0
         while True:
             try:
@@ -72,6 +74,30 @@ class MinioUploader(BaseUploader):
                 print(f"上传失败 {remote_path} (重试 {retry_count}): {e}")
                 time.sleep(2)
 
+    def upload_data(self, data: bytes, remote_path: str, md5: str = None) -> bool:
+        retry_count = 0
+        while True:
+            try:
+                self.client.put_object(self.bucket, remote_path, io.BytesIO(data), len(data))
+                return True
+            except S3Error as e:
+                retry_count += 1
+                print(f"上传失败 {remote_path} (重试 {retry_count}): {e}")
+                time.sleep(2)
+
+    def head_file(self, remote_path: str) -> dict:
+        try:
+            stat = self.client.stat_object(self.bucket, remote_path)
+        except S3Error as e:
+            if e.code not in ("NoSuchKey", "NoSuchObject"):
+                print(f"获取文件信息失败 {remote_path}: {e}")
+            return None
+        return {
+            "size": stat.size,
+            "etag": stat.etag,
+            "md5": self.etag_md5(stat.etag),
+        }
+
     def delete_prefix(self, prefix: str) -> bool:
         """删除指定前缀下的所有对象"""
         try:
@@ -84,17 +110,19 @@ class MinioUploader(BaseUploader):
             print(f"删除失败: {e}")
             return False
 
-    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False) -> bool:
+    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False,
+                     checksums: dict = None) -> bool:
         # 暂时屏蔽删除逻辑
         # if delete_all:
         #     print(f"删除远程目录: {remote_prefix}")
         #     self.delete_prefix(remote_prefix)
 
         total = len(files)
+        checksums = checksums or {}
         for i, rel_path in enumerate(files, 1):
             local_path = os.path.join(local_dir, rel_path)
             remote_path = f"{remote_prefix}/{rel_path}".replace("\\", "/")
             print(f"[{i}/{total}] 上传: {rel_path}")
-            if not self.upload_file(local_path, remote_path):
+            if not self.upload_file(local_path, remote_path, checksums.get(rel_path)):
                 return False
         return True
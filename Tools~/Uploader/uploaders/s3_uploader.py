@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import subprocess
@@ -8,6 +9,9 @@ from .base import BaseUploader
 class S3Uploader(BaseUploader):
     """AWS S3 上传器 (使用 aws cli)"""
 
+    # 每次上传都要启动 aws cli 进程，逐文件上传代价高，多目标上传时用 upload_files 一次 sync
+    streams_data = False
+
     def __init__(self, endpoint: str, bucket: str, access_key: str = None, secret_key: str = None, **kwargs):
         super().__init__(endpoint, bucket, access_key, secret_key, **kwargs)
         self.s3_bucket = bucket
@@ -18,16 +22,29 @@ class S3Uploader(BaseUploader):
             return f"s3://{self.s3_bucket}/{path}"
         return f"s3://{self.s3_bucket}"
 
-    def _run_cmd(self, cmd: str) -> bool:
-        print(f"[S3] 执行: {cmd}")
+    def _env(self) -> dict:
         env = os.environ.copy()
         if self.access_key:
             env["AWS_ACCESS_KEY_ID"] = self.access_key
         if self.secret_key:
             env["AWS_SECRET_ACCESS_KEY"] = self.secret_key
-        result = subprocess.run(cmd, shell=True, env=env)
+        return env
+
+    def _run_cmd(self, cmd: str) -> bool:
+        print(f"[S3] 执行: {cmd}")
+        result = subprocess.run(cmd, shell=True, env=self._env())
         return result.returncode == 0
 
+    def _run_json(self, cmd: str, default=None):
+        """执行命令并解析 JSON 输出，命令失败返回 None，输出为空返回 default（不打印命令，用于查询）"""
+        result = subprocess.run(cmd, shell=True, env=self._env(), capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        try:
+            return json.loads(result.stdout or "null") or default
+        except ValueError:
+            return None
+
     def ensure_bucket(self) -> bool:
         return True
 
@@ -35,17 +52,64 @@ class S3Uploader(BaseUploader):
         uri = self._s3_uri(remote_path)
         return self._run_cmd(f'aws s3 cp "{uri}" "{local_path}"')
 
-    def upload_file(self, local_path: str, remote_path: str) -> bool:
+    def upload_file(self, local_path: str, remote_path: str, md5: str = None) -> bool:
         uri = self._s3_uri(remote_path)
         self._run_cmd(f'aws s3 rm "{uri}"')
+        if md5:
+            # put-object 发送 Content-MD5，内容不一致时服务端拒绝写入
+            cmd = (f'aws s3api put-object --bucket "{self.s3_bucket}" --key "{remote_path}" --body "{local_path}" '
+                   f'--content-md5 "{self.content_md5(md5)}" --metadata md5={md5}')
+        else:
+            cmd = f'aws s3 cp "{local_path}" "{uri}"'
         for attempt in range(3):
-            if self._run_cmd(f'aws s3 cp "{local_path}" "{uri}"'):
+            if self._run_cmd(cmd):
                 return True
             print(f"[S3] 重试 {attempt + 1}/3...")
             time.sleep(2)
         return False
 
-    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False) -> bool:
+    def upload_data(self, data: bytes, remote_path: str, md5: str = None) -> bool:
+        # aws s3 cp 从 stdin 读取内容，避免写临时文件
+        # 该方式无法发送 Content-MD5，不写 md5 元数据，内容由校验阶段按 ETag 或回读确认
+        uri = self._s3_uri(remote_path)
+        cmd = f'aws s3 cp - "{uri}" --no-progress --expected-size {len(data)}'
+        for attempt in range(3):
+            print(f"[S3] 执行: {cmd}")
+            result = subprocess.run(cmd, shell=True, env=self._env(), input=data)
+            if result.returncode == 0:
+                return True
+            print(f"[S3] 重试 {attempt + 1}/3...")
+            time.sleep(2)
+        return False
+
+    def head_file(self, remote_path: str) -> dict:
+        info = self._run_json(f'aws s3api head-object --bucket "{self.s3_bucket}" --key "{remote_path}"')
+        if info is None:
+            return None
+        etag = info.get("ETag", "")
+        return {
+            "size": info.get("ContentLength", -1),
+            "etag": etag,
+            # put-object 的 md5 元数据经过 Content-MD5 校验，仅在 ETag 不是 MD5 时使用
+            "md5": self.etag_md5(etag) or info.get("Metadata", {}).get("md5"),
+        }
+
+    def stat_prefix(self, remote_prefix: str) -> dict:
+        # 一次 list-objects-v2（CLI 自动翻页）代替逐个 head-object，避免每个文件启动一个进程
+        prefix = remote_prefix.rstrip("/") + "/"
+        info = self._run_json(f'aws s3api list-objects-v2 --bucket "{self.s3_bucket}" --prefix "{prefix}" '
+                              f'--query "Contents[].{{Key: Key, Size: Size, ETag: ETag}}" --output json', default=[])
+        if info is None:
+            return None
+        result = {}
+        for obj in info:
+            etag = obj.get("ETag", "")
+            result[obj["Key"]] = {"size": obj.get("Size", -1), "etag": etag, "md5": self.etag_md5(etag)}
+        return result
+
+    def upload_files(self, local_dir: str, remote_prefix: str, files: list, delete_all: bool = False,
+                     checksums: dict = None) -> bool:
+        # sync 无法逐文件携带校验头，分段上传的文件由校验阶段按大小比对
         temp_dir = os.path.join(local_dir, "_upload_temp")
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
@@ -0,0 +1,117 @@
+"""
+上传结果校验
+以本地 version.json 为准比对远程对象的大小和服务端 MD5（单段 ETag 或经 Content-MD5 校验的元数据），
+后端支持时一次列举整个前缀，否则并发 HEAD；服务端无法确认 MD5 的文件优先进入抽样回读
+"""
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from checksum import calc_md5
+from uploaders import BaseUploader
+
+
+def _check_info(info: dict, local_path: str, md5: str):
+    """
+    比对远程文件信息
+
+    Returns:
+        (失败原因或 None, MD5 是否经服务端确认)
+    """
+    if info is None:
+        return "远程不存在", False
+    local_size = os.path.getsize(local_path)
+    if info["size"] != local_size:
+        return f"大小不一致 本地 {local_size} 远程 {info['size']}", False
+    if info["md5"] is None:
+        return None, False
+    if info["md5"] != md5:
+        return f"MD5 不一致 本地 {md5} 远程 {info['md5']}", False
+    return None, True
+
+
+def _check_download(uploader: BaseUploader, remote_path: str, md5: str) -> str:
+    """下载并重新计算 MD5，通过返回 None，否则返回失败原因"""
+    temp_file = tempfile.NamedTemporaryFile(delete=False)
+    temp_file.close()
+    try:
+        if not uploader.download_file(remote_path, temp_file.name):
+            return "下载失败"
+        remote_md5 = calc_md5(temp_file.name)
+        if remote_md5 != md5:
+            return f"回读 MD5 不一致 本地 {md5} 远程 {remote_md5}"
+        return None
+    finally:
+        os.unlink(temp_file.name)
+
+
+def verify_upload(uploader: BaseUploader, version_dir: str, remote_prefix: str, files: dict,
+                  sample_rate: float = 0.0, workers: int = 16) -> list:
+    """
+    校验远程文件与本地 version.json 一致
+
+    Args:
+        files: version.json 中的 {相对路径: MD5}
+        sample_rate: 抽样下载回读的比例 (0~1)，0 为不回读；服务端未确认 MD5 的文件优先被抽中
+        workers: 并发请求数
+
+    Returns:
+        校验失败的相对路径列表
+    """
+    rel_paths = sorted(files)
+    remote_paths = {rel_path: f"{remote_prefix}/{rel_path}".replace("\\", "/") for rel_path in rel_paths}
+    listing = uploader.stat_prefix(remote_prefix)
+
+    def head_task(rel_path):
+        local_path = os.path.join(version_dir, rel_path)
+        remote_path = remote_paths[rel_path]
+        try:
+            info = listing.get(remote_path) if listing is not None else uploader.head_file(remote_path)
+            reason, verified = _check_info(info, local_path, files[rel_path])
+        except Exception as e:
+            reason, verified = str(e), False
+        return rel_path, reason, verified
+
+    def download_task(rel_path):
+        try:
+            reason = _check_download(uploader, remote_paths[rel_path], files[rel_path])
+        except Exception as e:
+            reason = str(e)
+        return rel_path, reason
+
+    print(f"校验远程文件: {len(rel_paths)} 个")
+    failed = []
+    unverified = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for rel_path, reason, verified in executor.map(head_task, rel_paths):
+            if reason:
+                print(f"  ✗ {rel_path} - {reason}")
+                failed.append(rel_path)
+            elif not verified:
+                unverified.append(rel_path)
+
+        # 抽样回读：先抽服务端未确认 MD5 的文件，再从其余文件中补足
+        sampled = []
+        if sample_rate > 0 and rel_paths:
+            count = max(1, int(len(rel_paths) * min(sample_rate, 1.0)))
+            random.shuffle(unverified)
+            excluded = set(failed) | set(unverified)
+            others = [rel_path for rel_path in rel_paths if rel_path not in excluded]
+            random.shuffle(others)
+            sampled = (unverified + others)[:count]
+            print(f"抽样回读: {len(sampled)} 个")
+            for rel_path, reason in executor.map(download_task, sampled):
+                if reason:
+                    print(f"  ✗ {rel_path} - {reason}")
+                    failed.append(rel_path)
+
+    skipped = len(set(unverified) - set(sampled))
+    if skipped:
+        print(f"注意: {skipped} 个文件服务端未提供 MD5，仅校验了大小 (可用 --verify-sample 回读)")
+
+    if failed:
+        print(f"校验失败: {len(failed)}/{len(rel_paths)}")
+    else:
+        print(f"校验通过: {len(rel_paths)} 个文件")
+    return failed
@@ -0,0 +1,86 @@
+"""
+监听模式的文件稳定检测
+轮询目录（os.scandir，只比较 size/mtime），文件在 settle_seconds 内无变化才视为写入完成
+"""
+import os
+import time
+
+
+def _scan(root: str, ignore: set) -> dict:
+    """递归扫描目录，返回 {相对路径: (size, mtime_ns)}"""
+    result = {}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            rel_path = os.path.relpath(entry.path, root).replace("\\", "/")
+            if rel_path in ignore:
+                continue
+            result[rel_path] = (st.st_size, st.st_mtime_ns)
+    return result
+
+
+class SettleTracker:
+    """跟踪目录内文件的写入状态，返回已稳定且内容（size/mtime）有变化的文件"""
+
+    def __init__(self, root: str, settle_seconds: float, ignore: set = None):
+        self.root = root
+        self.settle_seconds = settle_seconds
+        self.ignore = ignore or set()
+        self._seen = {}     # 相对路径 -> (stat, 首次看到该 stat 的时间)
+        self._emitted = {}  # 相对路径 -> 已返回过的 stat
+
+    def poll(self, force: bool = False) -> list:
+        """
+        扫描一次目录
+
+        Args:
+            force: 为 True 时忽略稳定时间（构建已结束）
+
+        Returns:
+            [(相对路径, stat)]，每个 stat 只返回一次
+        """
+        now = time.monotonic()
+        current = _scan(self.root, self.ignore)
+
+        for rel_path in list(self._seen):
+            if rel_path not in current:
+                del self._seen[rel_path]
+                self._emitted.pop(rel_path, None)
+
+        settled = []
+        for rel_path, stat in current.items():
+            seen = self._seen.get(rel_path)
+            if seen is None or seen[0] != stat:
+                self._seen[rel_path] = (stat, now)
+                if not force:
+                    continue
+            elif not force and now - seen[1] < self.settle_seconds:
+                continue
+            if self._emitted.get(rel_path) != stat:
+                self._emitted[rel_path] = stat
+                settled.append((rel_path, stat))
+        return settled
+
+    def stat(self, rel_path: str):
+        """当前文件的 (size, mtime_ns)，不存在返回 None"""
+        try:
+            st = os.stat(os.path.join(self.root, rel_path))
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def files(self) -> set:
+        """当前跟踪的文件"""
+        return set(self._seen)